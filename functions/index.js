@@ -1,20 +1,53 @@
 const functions = require("firebase-functions");
 const cors = require("cors")({ origin: true });
 
+// USDA search endpoint. Node's built-in fetch (undici) keeps a shared
+// keep-alive connection pool per origin, so repeated calls here reuse
+// the same TLS connection for the lifetime of the function instance.
+const USDA_SEARCH_URL = "https://api.nal.usda.gov/fdc/v1/foods/search";
+
+// Resolved once per instance; the environment is fixed after deploy
+const USDA_API_KEY = process.env.USDA_API_KEY;
+
+// Macro nutrient numbers — USDA's stable identifiers, robust to the
+// display names being reworded: 208=Energy (kcal), 957=Energy (Atwater),
+// 203=Protein, 205=Carbohydrate, 204=Total fat
+const WANTED_NUTRIENT_NUMBERS = {
+    "208": "calories",
+    "957": "caloriesAlt",
+    "203": "protein",
+    "205": "carbs",
+    "204": "fat"
+};
+
+// Nutrient-name fallback, used only for records without a nutrientNumber;
+// records with a known-but-unwanted number (e.g. 268, Energy in kJ) must
+// never match by name
+const WANTED_NUTRIENTS = {
+    "Energy": "calories",
+    "Energy (Atwater General Factors)": "caloriesAlt",
+    "Protein": "protein",
+    "Carbohydrate, by difference": "carbs",
+    "Total lipid (fat)": "fat"
+};
+
+// Parse patterns, compiled once and shared across requests:
+// items split on comma or " and "; quantities match "2 ", "1.5 ", "a ", "an "
+const ITEM_SPLIT_RE = /,| and /i;
+const QUANTITY_RE = /^(\d+(\.\d+)?|a|an)\s+(.*)/i;
+
 /**
  * Helper to parse natural language query into items
  * e.g. "2 eggs, a banana" -> [{qty: 2, text: "eggs"}, {qty: 1, text: "banana"}]
  */
 function parseItems(query) {
-    // Split by comma or " and "
-    const parts = query.split(/,| and /i).map(s => s.trim()).filter(s => s);
+    const parts = query.split(ITEM_SPLIT_RE).map(s => s.trim()).filter(s => s);
 
     return parts.map(part => {
         let qty = 1;
         let text = part;
 
-        // Match quantity at start: "2 ", "1.5 ", "a ", "an "
-        const match = part.match(/^(\d+(\.\d+)?|a|an)\s+(.*)/i);
+        const match = part.match(QUANTITY_RE);
         if (match) {
             if (match[1].toLowerCase() === 'a' || match[1].toLowerCase() === 'an') {
                 qty = 1;
@@ -29,25 +62,78 @@ function parseItems(query) {
 }
 
 /**
- * Search USDA API for a single food item with retry
+ * Search USDA API for a single food item.
+ * Tries a narrow single-result query against the curated datasets first
+ * (a fraction of the response payload), then falls back to the original
+ * broad five-result search when that comes up empty.
  */
-async function searchFood(apiKey, itemText, retries = 2) {
-    const url = new URL("https://api.nal.usda.gov/fdc/v1/foods/search");
-    url.searchParams.append("api_key", apiKey);
-    url.searchParams.append("query", itemText);
-    url.searchParams.append("pageSize", "5");
+async function searchFood(apiKey, itemText) {
+    const narrow = new URLSearchParams({
+        api_key: apiKey,
+        query: itemText,
+        pageSize: "1",
+        dataType: "Foundation,SR Legacy,Survey (FNDDS)"
+    });
+    const result = await fetchFood(`${USDA_SEARCH_URL}?${narrow}`, itemText);
+    if (result && result.calories > 0) {
+        return result;
+    }
+
     // Removed dataType filter for broader, more reliable matching
+    const broad = new URLSearchParams({
+        api_key: apiKey,
+        query: itemText,
+        pageSize: "5"
+    });
+    return await fetchFood(`${USDA_SEARCH_URL}?${broad}`, itemText) || result;
+}
 
+/**
+ * Coerce a USDA nutrient value to a number. Values are usually numbers
+ * already, so the typeof check keeps the common case to a single branch;
+ * string values (seen in some legacy records) fall back to parseFloat.
+ */
+function toNumber(value) {
+    if (typeof value === "number") return value;
+    const n = parseFloat(value);
+    return Number.isFinite(n) ? n : 0;
+}
+
+/**
+ * Exponential backoff with jitter, so retries from concurrent lookups
+ * don't land on the rate limiter in lockstep
+ */
+function retryDelay(attempt) {
+    const base = 300 * Math.pow(2, attempt);
+    return Math.min(base * (0.5 + Math.random()), 5000);
+}
+
+/**
+ * Fetch and parse a single USDA search request with retry
+ */
+async function fetchFood(url, itemText, retries = 2) {
     for (let attempt = 0; attempt <= retries; attempt++) {
         try {
             console.log(`Searching for '${itemText}' (attempt ${attempt + 1})`);
-            const response = await fetch(url.toString());
+            const response = await fetch(url);
 
             if (!response.ok) {
+                // Log enough of the body to diagnose, not a whole error page
                 const text = await response.text();
-                console.error(`USDA API Error (${response.status}):`, text);
-                if (attempt < retries) {
-                    await new Promise(r => setTimeout(r, 300)); // Wait before retry
+                console.error(`USDA API Error (${response.status}):`, text.slice(0, 300));
+                // Only retry statuses a second attempt can actually fix;
+                // 4xx responses (bad key, bad request) fail the same way every time
+                const retryable = response.status === 429 || response.status >= 500;
+                if (retryable && attempt < retries) {
+                    // Honor Retry-After on 429s, clamped to the same 5 s
+                    // ceiling as the backoff — api.data.gov can send the
+                    // seconds until the hourly quota resets, and parking a
+                    // billed function on that is worse than failing fast
+                    const retryAfter = Math.min(
+                        Number(response.headers.get("retry-after")) * 1000 || 0,
+                        5000
+                    );
+                    await new Promise(r => setTimeout(r, retryAfter || retryDelay(attempt)));
                     continue;
                 }
                 return null;
@@ -58,17 +144,37 @@ async function searchFood(apiKey, itemText, retries = 2) {
 
             if (foods.length > 0) {
                 const food = foods[0];
-                const nutrients = {};
+                // Pull just the macros we need in one pass instead of
+                // building a dict of every nutrient in the response,
+                // and stop scanning once every slot is filled
+                const macros = { calories: 0, caloriesAlt: 0, protein: 0, carbs: 0, fat: 0 };
+                // Four slots, not five: no record carries both energy
+                // numbers (208 is SR Legacy/FNDDS, 957 is Foundation),
+                // so the two variants fill a single shared slot
+                let remaining = 4;
                 for (const n of food.foodNutrients || []) {
-                    nutrients[n.nutrientName] = n.value || 0;
+                    const key = n.nutrientNumber
+                        ? WANTED_NUTRIENT_NUMBERS[n.nutrientNumber]
+                        : WANTED_NUTRIENTS[n.nutrientName];
+                    if (key) {
+                        const value = toNumber(n.value);
+                        if (value) {
+                            const filled = (key === "calories" || key === "caloriesAlt")
+                                ? macros.calories || macros.caloriesAlt
+                                : macros[key];
+                            if (!filled) remaining--;
+                        }
+                        macros[key] = value;
+                        if (remaining === 0) break;
+                    }
                 }
 
                 return {
                     name: food.description,
-                    calories: nutrients["Energy"] || nutrients["Energy (Atwater General Factors)"] || 0,
-                    protein: nutrients["Protein"] || 0,
-                    carbs: nutrients["Carbohydrate, by difference"] || 0,
-                    fat: nutrients["Total lipid (fat)"] || 0
+                    calories: macros.calories || macros.caloriesAlt,
+                    protein: macros.protein,
+                    carbs: macros.carbs,
+                    fat: macros.fat
                 };
             }
 
@@ -79,7 +185,7 @@ async function searchFood(apiKey, itemText, retries = 2) {
         } catch (error) {
             console.error(`Error searching for '${itemText}':`, error.message);
             if (attempt < retries) {
-                await new Promise(r => setTimeout(r, 300));
+                await new Promise(r => setTimeout(r, retryDelay(attempt)));
                 continue;
             }
             return null;
@@ -90,7 +196,7 @@ async function searchFood(apiKey, itemText, retries = 2) {
 
 /**
  * Firebase Cloud Function to proxy USDA FoodData Central API calls.
- * Supports quantity parsing and multiple items with reliable sequential processing.
+ * Supports quantity parsing and multiple items, looked up concurrently.
  */
 exports.searchFood = functions.https.onRequest((req, res) => {
     cors(req, res, async () => {
@@ -101,8 +207,7 @@ exports.searchFood = functions.https.onRequest((req, res) => {
                 return res.status(400).json({ error: "Missing 'query' parameter" });
             }
 
-            const apiKey = process.env.USDA_API_KEY;
-            if (!apiKey) {
+            if (!USDA_API_KEY) {
                 return res.status(500).json({ error: "USDA API key not configured" });
             }
 
@@ -114,9 +219,16 @@ exports.searchFood = functions.https.onRequest((req, res) => {
             let foundItems = [];
             let notFoundItems = [];
 
-            // Process items SEQUENTIALLY to avoid rate limiting
-            for (const item of items) {
-                const result = await searchFood(apiKey, item.text);
+            // Look up all items concurrently; a meal has at most a handful
+            // of items, well under the USDA rate limit, and each lookup
+            // keeps its own retry loop for transient failures
+            const results = await Promise.all(
+                items.map(item => searchFood(USDA_API_KEY, item.text))
+            );
+
+            for (let i = 0; i < items.length; i++) {
+                const item = items[i];
+                const result = results[i];
 
                 if (result) {
                     foundItems.push(`${item.qty} x ${result.name}`);
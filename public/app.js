@@ -7,6 +7,38 @@
 // Firebase Function URL
 const API_URL = 'https://us-central1-macrosfood.cloudfunctions.net/searchFood';
 
+// Shared formatter options, built once instead of per call
+const TIME_FORMAT = { hour: 'numeric', minute: '2-digit' };
+const DATE_FORMAT = { weekday: 'short', month: 'short', day: 'numeric' };
+
+// Macro fields and their display units, in dashboard order
+const MACROS = [
+    { key: 'calories', unit: '' },
+    { key: 'protein', unit: 'g' },
+    { key: 'carbs', unit: 'g' },
+    { key: 'fat', unit: 'g' }
+];
+
+// Lookup cache settings; entries persist across sessions, and nutrition
+// data is stable enough that a long TTL is safe
+const LOOKUP_CACHE_TTL = 30 * 24 * 60 * 60 * 1000; // 30 days
+const LOOKUP_CACHE_MAX = 512;
+const LOOKUP_CACHE_KEY = 'macrometerLookupCache';
+
+// localStorage keys, split per store so a flush only writes what changed
+const GOALS_KEY = 'macrometerGoals';
+const FAVORITES_KEY = 'macrometerFavorites';
+const HISTORY_KEY = 'macrometerHistory';
+
+// Cached lookup results, keyed by normalized query
+const lookupCache = new Map();
+
+// Controller for the in-flight lookup, so it can be aborted
+let lookupController = null;
+
+// Lowercased favorite names, for constant-time duplicate checks
+let favoriteNames = new Set();
+
 // State
 let state = {
     goals: { calories: 2000, protein: 150, carbs: 250, fat: 65 },
@@ -53,6 +85,7 @@ const elements = {
     historyContainer: document.getElementById('history-container'),
     clearHistoryBtn: document.getElementById('clear-history-btn'),
     // Settings
+    goalsForm: document.getElementById('goals-form'),
     goalCalories: document.getElementById('goal-calories'),
     goalProtein: document.getElementById('goal-protein'),
     goalCarbs: document.getElementById('goal-carbs'),
@@ -67,52 +100,124 @@ const elements = {
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     loadState();
+    loadLookupCache();
     setupEventListeners();
     updateUI();
 });
 
+// Coerce macro fields to integers once, at load time
+function normalizeMeal(meal) {
+    for (const { key } of MACROS) {
+        meal[key] = Math.round(Number(meal[key]) || 0);
+    }
+    return meal;
+}
+
 // Load state from localStorage
 function loadState() {
-    const saved = localStorage.getItem('macrometerState');
-    if (saved) {
-        const parsed = JSON.parse(saved);
-        state.goals = parsed.goals || state.goals;
-        state.favorites = parsed.favorites || [];
-        state.history = parsed.history || [];
+    // One-time migration from the old combined macrometerState blob
+    const legacy = localStorage.getItem('macrometerState');
+    if (legacy) {
+        const parsed = JSON.parse(legacy);
+        if (parsed.goals) localStorage.setItem(GOALS_KEY, JSON.stringify(parsed.goals));
+        if (parsed.favorites) localStorage.setItem(FAVORITES_KEY, JSON.stringify(parsed.favorites));
+        if (parsed.history) localStorage.setItem(HISTORY_KEY, JSON.stringify(parsed.history));
+        localStorage.removeItem('macrometerState');
     }
 
+    const storedGoals = JSON.parse(localStorage.getItem(GOALS_KEY));
+    state.favorites = (JSON.parse(localStorage.getItem(FAVORITES_KEY)) || []).map(normalizeMeal);
+    state.history = JSON.parse(localStorage.getItem(HISTORY_KEY)) || [];
+    favoriteNames = new Set(state.favorites.map(f => f.name.toLowerCase()));
+
     // Load today's meals
     const today = getToday();
     const todayMeals = localStorage.getItem(`meals_${today}`);
     if (todayMeals) {
-        state.meals = JSON.parse(todayMeals);
+        state.meals = JSON.parse(todayMeals).map(normalizeMeal);
+    }
+    currentTotals = calculateTotals();
+
+    // Only touch the goal inputs when the stored goals actually differ,
+    // so a cross-tab refresh can't clobber values the user is mid-typing
+    if (storedGoals && JSON.stringify(storedGoals) !== JSON.stringify(state.goals)) {
+        state.goals = storedGoals;
+        elements.goalCalories.value = state.goals.calories;
+        elements.goalProtein.value = state.goals.protein;
+        elements.goalCarbs.value = state.goals.carbs;
+        elements.goalFat.value = state.goals.fat;
     }
-
-    // Set goal inputs
-    elements.goalCalories.value = state.goals.calories;
-    elements.goalProtein.value = state.goals.protein;
-    elements.goalCarbs.value = state.goals.carbs;
-    elements.goalFat.value = state.goals.fat;
 }
 
-// Save state to localStorage
-function saveState() {
-    localStorage.setItem('macrometerState', JSON.stringify({
-        goals: state.goals,
-        favorites: state.favorites,
-        history: state.history
-    }));
+// Canonical persisted meal shape; any other fields are transient
+function toStoredMeal(meal) {
+    return {
+        id: meal.id,
+        name: meal.name,
+        time: meal.time,
+        calories: meal.calories,
+        protein: meal.protein,
+        carbs: meal.carbs,
+        fat: meal.fat
+    };
 }
 
 // Save today's meals
 function saveTodayMeals() {
     const today = getToday();
-    localStorage.setItem(`meals_${today}`, JSON.stringify(state.meals));
+    localStorage.setItem(`meals_${today}`, JSON.stringify(state.meals.map(toStoredMeal)));
+}
+
+// Pending write timer and the stores waiting to be written
+let persistTimer = null;
+const dirtyStores = new Set();
+
+// Per-store versions, bumped on every mutation; render guards compare
+// these instead of re-serializing the data to diff it
+const storeVersions = { goals: 0, favorites: 0, history: 0, meals: 0, cache: 0 };
+
+// Mark a store dirty; consecutive mutations share one flush
+function schedulePersist(store) {
+    storeVersions[store]++;
+    dirtyStores.add(store);
+    if (persistTimer === null) {
+        persistTimer = setTimeout(flushPersist, 0);
+    }
+}
+
+// Flush only the dirty stores to localStorage
+function flushPersist() {
+    if (persistTimer === null) return;
+    clearTimeout(persistTimer);
+    persistTimer = null;
+    if (dirtyStores.has('goals')) {
+        localStorage.setItem(GOALS_KEY, JSON.stringify(state.goals));
+    }
+    if (dirtyStores.has('favorites')) {
+        localStorage.setItem(FAVORITES_KEY, JSON.stringify(state.favorites.map(toStoredMeal)));
+    }
+    if (dirtyStores.has('history')) {
+        localStorage.setItem(HISTORY_KEY, JSON.stringify(state.history));
+    }
+    if (dirtyStores.has('meals')) {
+        saveTodayMeals();
+    }
+    if (dirtyStores.has('cache')) {
+        saveLookupCache();
+    }
+    dirtyStores.clear();
 }
 
+// Cached date string, refreshed when the UTC day rolls over
+let todayCache = { day: -1, str: '' };
+
 // Get today's date string
 function getToday() {
-    return new Date().toISOString().split('T')[0];
+    const day = Math.floor(Date.now() / 86400000);
+    if (day !== todayCache.day) {
+        todayCache = { day, str: new Date().toISOString().split('T')[0] };
+    }
+    return todayCache.str;
 }
 
 // Setup event listeners
@@ -133,11 +238,52 @@ function setupEventListeners() {
     elements.addFavoriteBtn.addEventListener('click', addMealAndFavorite);
     elements.cancelBtn.addEventListener('click', cancelPending);
 
-    // Settings
-    elements.saveGoalsBtn.addEventListener('click', saveGoals);
+    // Meal and favorite rows (delegated, so rebuilt rows need no rebinding)
+    elements.mealsContainer.addEventListener('click', (e) => {
+        const btn = e.target.closest('button[data-id]');
+        if (btn) removeMeal(Number(btn.dataset.id));
+    });
+    elements.favoritesContainer.addEventListener('click', (e) => {
+        const btn = e.target.closest('button[data-id]');
+        if (!btn) return;
+        const id = Number(btn.dataset.id);
+        if (btn.dataset.action === 'add') {
+            addFavoriteToMeals(id);
+        } else {
+            removeFavorite(id);
+        }
+    });
+
+    // Settings: goals apply as one form submit (Enter in any field works too)
+    elements.goalsForm.addEventListener('submit', (e) => {
+        e.preventDefault();
+        saveGoals();
+    });
     elements.clearMealsBtn.addEventListener('click', clearMeals);
     elements.exportBtn.addEventListener('click', exportHistory);
     elements.clearHistoryBtn.addEventListener('click', clearHistory);
+
+    // Another tab wrote our keys: re-read state and refresh. This is the
+    // localStorage analogue of invalidating a cached file by its mtime.
+    window.addEventListener('storage', (e) => {
+        // Cache writes don't affect rendered state; don't reload for them
+        if (e.key === LOOKUP_CACHE_KEY) return;
+        if (e.key && !e.key.startsWith('macrometer') && !e.key.startsWith('meals_')) return;
+        // Write out our own pending mutations first, or loadState would
+        // resurrect pre-mutation data and the flush would persist it
+        flushPersist();
+        loadState();
+        for (const store of ['goals', 'favorites', 'history', 'meals']) {
+            storeVersions[store]++;
+        }
+        updateUI();
+    });
+
+    // Flush any pending writes before the page goes away
+    window.addEventListener('pagehide', flushPersist);
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') flushPersist();
+    });
 }
 
 // Switch tab
@@ -149,6 +295,62 @@ function switchTab(tabId) {
     document.getElementById(tabId).classList.add('active');
 }
 
+// Hydrate the lookup cache from localStorage, dropping expired entries
+function loadLookupCache() {
+    const saved = localStorage.getItem(LOOKUP_CACHE_KEY);
+    if (!saved) return;
+    try {
+        const now = Date.now();
+        for (const [key, entry] of JSON.parse(saved)) {
+            if (now - entry.time <= LOOKUP_CACHE_TTL) {
+                lookupCache.set(key, entry);
+            }
+        }
+    } catch (error) {
+        localStorage.removeItem(LOOKUP_CACHE_KEY);
+    }
+}
+
+// Persist the lookup cache (Map serializes as [key, entry] pairs)
+function saveLookupCache() {
+    localStorage.setItem(LOOKUP_CACHE_KEY, JSON.stringify([...lookupCache]));
+}
+
+// Get a cached lookup result, or null if missing/expired
+function getCachedLookup(key) {
+    const entry = lookupCache.get(key);
+    if (!entry) return null;
+    if (Date.now() - entry.time > LOOKUP_CACHE_TTL) {
+        lookupCache.delete(key);
+        return null;
+    }
+    // Re-insert so the Map stays ordered oldest-first for eviction
+    lookupCache.delete(key);
+    lookupCache.set(key, entry);
+    return entry.data;
+}
+
+// Store a successful lookup result, evicting the oldest entry if full
+function cacheLookup(key, data) {
+    if (lookupCache.size >= LOOKUP_CACHE_MAX) {
+        lookupCache.delete(lookupCache.keys().next().value);
+    }
+    lookupCache.set(key, { time: Date.now(), data });
+    schedulePersist('cache');
+}
+
+// Set the pending meal from a lookup result
+function setPendingMeal(query, data) {
+    state.pendingMeal = {
+        name: query,
+        calories: Math.round(data.calories),
+        protein: Math.round(data.protein),
+        carbs: Math.round(data.carbs),
+        fat: Math.round(data.fat)
+    };
+    showPendingMeal();
+}
+
 // Lookup meal from API
 async function lookupMeal() {
     const query = elements.mealInput.value.trim();
@@ -157,11 +359,40 @@ async function lookupMeal() {
         return;
     }
 
+    // Serve repeat queries from the cache without a network round-trip;
+    // collapse inner whitespace so "2  eggs" and "2 eggs" share an entry
+    const cacheKey = query.toLowerCase().replace(/\s+/g, ' ');
+    const cached = getCachedLookup(cacheKey);
+    if (cached) {
+        setPendingMeal(query, cached);
+        return;
+    }
+
+    // If this exact query is already in flight, reuse it rather than
+    // aborting and paying the round-trip again
+    if (lookupController && lookupController.queryKey === cacheKey) return;
+
+    // A different lookup supersedes any request still in flight
+    if (lookupController) lookupController.abort();
+    const controller = new AbortController();
+    controller.queryKey = cacheKey;
+    lookupController = controller;
+
     elements.lookupBtn.disabled = true;
     elements.lookupBtn.innerHTML = '<span class="loading"></span>';
 
     try {
-        const response = await fetch(`${API_URL}?query=${encodeURIComponent(query)}`);
+        const response = await fetch(`${API_URL}?query=${encodeURIComponent(query)}`, {
+            signal: controller.signal
+        });
+
+        // Don't try to decode non-JSON bodies (e.g. gateway error pages)
+        const contentType = response.headers.get('content-type') || '';
+        if (!contentType.includes('application/json')) {
+            showToast(`Lookup failed (HTTP ${response.status}). Please try again.`, 'error');
+            return;
+        }
+
         const data = await response.json();
 
         if (data.error || !data.found) {
@@ -169,22 +400,20 @@ async function lookupMeal() {
             return;
         }
 
-        state.pendingMeal = {
-            name: query,
-            calories: Math.round(data.calories),
-            protein: Math.round(data.protein),
-            carbs: Math.round(data.carbs),
-            fat: Math.round(data.fat)
-        };
-
-        showPendingMeal();
+        cacheLookup(cacheKey, data);
+        setPendingMeal(query, data);
 
     } catch (error) {
+        if (error.name === 'AbortError') return;
         console.error('API Error:', error);
         showToast('Failed to fetch nutrition data. Please try again.', 'error');
     } finally {
-        elements.lookupBtn.disabled = false;
-        elements.lookupBtn.innerHTML = '🔍 Look Up';
+        // Only restore the button if a newer lookup hasn't taken over
+        if (lookupController === controller) {
+            lookupController = null;
+            elements.lookupBtn.disabled = false;
+            elements.lookupBtn.innerHTML = '🔍 Look Up';
+        }
     }
 }
 
@@ -205,23 +434,29 @@ function hidePendingMeal() {
     state.pendingMeal = null;
 }
 
+// Build a timestamped log entry from a pending meal or favorite
+function makeMealEntry(source) {
+    return {
+        ...source,
+        id: Date.now(),
+        time: new Date().toLocaleTimeString('en-US', TIME_FORMAT)
+    };
+}
+
 // Add meal to today's log
 function addMeal() {
     if (!state.pendingMeal) return;
 
-    const meal = {
-        ...state.pendingMeal,
-        id: Date.now(),
-        time: new Date().toLocaleTimeString('en-US', { hour: 'numeric', minute: '2-digit' })
-    };
+    const meal = makeMealEntry(state.pendingMeal);
 
     state.meals.push(meal);
-    saveTodayMeals();
+    applyToTotals(meal, 1);
     saveToHistory();
+    schedulePersist('meals');
 
     elements.mealInput.value = '';
     hidePendingMeal();
-    updateUI();
+    updateUI(['progress', 'meals', 'history']);
     showToast(`Added: ${meal.name}`, 'success');
 }
 
@@ -230,10 +465,12 @@ function addMealAndFavorite() {
     if (!state.pendingMeal) return;
 
     // Add to favorites if not already there
-    const exists = state.favorites.some(f => f.name.toLowerCase() === state.pendingMeal.name.toLowerCase());
-    if (!exists) {
+    const nameKey = state.pendingMeal.name.toLowerCase();
+    if (!favoriteNames.has(nameKey)) {
         state.favorites.push({ ...state.pendingMeal, id: Date.now() });
-        saveState();
+        favoriteNames.add(nameKey);
+        schedulePersist('favorites');
+        updateUI(['favorites']);
     }
 
     addMeal();
@@ -242,16 +479,20 @@ function addMealAndFavorite() {
 
 // Cancel pending meal
 function cancelPending() {
+    if (lookupController) lookupController.abort();
     hidePendingMeal();
     elements.mealInput.value = '';
 }
 
 // Remove meal
 function removeMeal(id) {
+    const meal = state.meals.find(m => m.id === id);
+    if (!meal) return;
+    applyToTotals(meal, -1);
     state.meals = state.meals.filter(m => m.id !== id);
-    saveTodayMeals();
     saveToHistory();
-    updateUI();
+    schedulePersist('meals');
+    updateUI(['progress', 'meals', 'history']);
     showToast('Meal removed', 'success');
 }
 
@@ -260,24 +501,23 @@ function addFavoriteToMeals(id) {
     const fav = state.favorites.find(f => f.id === id);
     if (!fav) return;
 
-    const meal = {
-        ...fav,
-        id: Date.now(),
-        time: new Date().toLocaleTimeString('en-US', { hour: 'numeric', minute: '2-digit' })
-    };
+    const meal = makeMealEntry(fav);
 
     state.meals.push(meal);
-    saveTodayMeals();
+    applyToTotals(meal, 1);
     saveToHistory();
-    updateUI();
+    schedulePersist('meals');
+    updateUI(['progress', 'meals', 'history']);
     showToast(`Added: ${meal.name}`, 'success');
 }
 
 // Remove favorite
 function removeFavorite(id) {
+    const fav = state.favorites.find(f => f.id === id);
+    if (fav) favoriteNames.delete(fav.name.toLowerCase());
     state.favorites = state.favorites.filter(f => f.id !== id);
-    saveState();
-    updateUI();
+    schedulePersist('favorites');
+    updateUI(['favorites']);
     showToast('Favorite removed', 'success');
 }
 
@@ -289,8 +529,8 @@ function saveGoals() {
         carbs: parseInt(elements.goalCarbs.value) || 250,
         fat: parseInt(elements.goalFat.value) || 65
     };
-    saveState();
-    updateUI();
+    schedulePersist('goals');
+    updateUI(['progress']);
     showToast('Goals updated!', 'success');
 }
 
@@ -298,18 +538,22 @@ function saveGoals() {
 function clearMeals() {
     if (!confirm('Clear all meals for today?')) return;
     state.meals = [];
-    saveTodayMeals();
-    updateUI();
+    currentTotals = { calories: 0, protein: 0, carbs: 0, fat: 0 };
+    schedulePersist('meals');
+    updateUI(['progress', 'meals']);
     showToast('Meals cleared', 'success');
 }
 
 // Save to history
 function saveToHistory() {
     const today = getToday();
-    const totals = calculateTotals();
+    const totals = currentTotals;
 
-    // Update or add today's entry
-    const existingIndex = state.history.findIndex(h => h.date === today);
+    // Update or add today's entry; it's almost always at the front, so
+    // check there before scanning
+    const existingIndex = (state.history.length && state.history[0].date === today)
+        ? 0
+        : state.history.findIndex(h => h.date === today);
     const entry = {
         date: today,
         ...totals,
@@ -324,18 +568,24 @@ function saveToHistory() {
 
     // Keep only last 30 days
     state.history = state.history.slice(0, 30);
-    saveState();
+    schedulePersist('history');
 }
 
 // Clear history
 function clearHistory() {
     if (!confirm('Clear all history? This cannot be undone.')) return;
     state.history = [];
-    saveState();
-    updateUI();
+    schedulePersist('history');
+    updateUI(['history']);
     showToast('History cleared', 'success');
 }
 
+// Quote a CSV field if it contains a delimiter, quote, or newline
+function csvField(value) {
+    const s = String(value);
+    return /[",\n]/.test(s) ? `"${s.replace(/"/g, '""')}"` : s;
+}
+
 // Export history to CSV
 function exportHistory() {
     if (state.history.length === 0) {
@@ -343,7 +593,7 @@ function exportHistory() {
         return;
     }
 
-    const headers = ['Date', 'Calories', 'Protein', 'Carbs', 'Fat', 'Cal Goal', 'Protein Goal', 'Carbs Goal', 'Fat Goal'];
+    const headers = 'Date,Calories,Protein,Carbs,Fat,Cal Goal,Protein Goal,Carbs Goal,Fat Goal';
     const rows = state.history.map(h => [
         h.date,
         h.calories,
@@ -354,9 +604,9 @@ function exportHistory() {
         h.goals.protein,
         h.goals.carbs,
         h.goals.fat
-    ]);
+    ].map(csvField).join(','));
 
-    const csv = [headers, ...rows].map(r => r.join(',')).join('\n');
+    const csv = `${headers}\n${rows.join('\n')}`;
     const blob = new Blob([csv], { type: 'text/csv' });
     const url = URL.createObjectURL(blob);
 
@@ -364,69 +614,76 @@ function exportHistory() {
     a.href = url;
     a.download = `macrometer_history_${getToday()}.csv`;
     a.click();
-    URL.revokeObjectURL(url);
+    // Revoke after the download has had a chance to start
+    setTimeout(() => URL.revokeObjectURL(url), 1000);
 
     showToast('History exported!', 'success');
 }
 
-// Calculate totals
+// Running totals for today's meals, maintained as meals change so read
+// paths never rescan the list
+let currentTotals = { calories: 0, protein: 0, carbs: 0, fat: 0 };
+
+// Apply a meal's macros to the running totals (sign -1 removes it)
+function applyToTotals(meal, sign) {
+    for (const { key } of MACROS) {
+        currentTotals[key] += sign * meal[key];
+    }
+}
+
+// Calculate totals in one pass over the meals
 function calculateTotals() {
-    return state.meals.reduce((acc, meal) => ({
-        calories: acc.calories + meal.calories,
-        protein: acc.protein + meal.protein,
-        carbs: acc.carbs + meal.carbs,
-        fat: acc.fat + meal.fat
-    }), { calories: 0, protein: 0, carbs: 0, fat: 0 });
+    const totals = { calories: 0, protein: 0, carbs: 0, fat: 0 };
+    for (const meal of state.meals) {
+        for (const { key } of MACROS) {
+            totals[key] += meal[key];
+        }
+    }
+    return totals;
 }
 
-// Update UI
-function updateUI() {
-    updateProgress();
-    updateMealsList();
-    updateFavoritesList();
-    updateHistoryList();
+// Last-rendered snapshots so unchanged lists skip DOM rebuilds
+const renderCache = { progress: null, meals: null, favorites: null, history: null };
+
+// Update UI, optionally limited to the named sections
+function updateUI(sections) {
+    const all = !sections;
+    if (all || sections.includes('progress')) updateProgress();
+    if (all || sections.includes('meals')) updateMealsList();
+    if (all || sections.includes('favorites')) updateFavoritesList();
+    if (all || sections.includes('history')) updateHistoryList();
 }
 
 // Update progress bars
 function updateProgress() {
-    const totals = calculateTotals();
+    const totals = currentTotals;
     const { goals } = state;
 
-    // Calories
-    const calPct = Math.min((totals.calories / goals.calories) * 100, 100);
-    const calRemaining = goals.calories - totals.calories;
-    elements.caloriesValue.textContent = `${totals.calories} / ${goals.calories}`;
-    elements.caloriesBar.style.width = `${calPct}%`;
-    elements.caloriesRemaining.textContent = calRemaining >= 0 ? `${calRemaining} remaining` : `${Math.abs(calRemaining)} over`;
-    elements.caloriesRemaining.className = `progress-remaining ${calRemaining < 0 ? 'over' : ''}`;
-
-    // Protein
-    const proPct = Math.min((totals.protein / goals.protein) * 100, 100);
-    const proRemaining = goals.protein - totals.protein;
-    elements.proteinValue.textContent = `${totals.protein}g / ${goals.protein}g`;
-    elements.proteinBar.style.width = `${proPct}%`;
-    elements.proteinRemaining.textContent = proRemaining >= 0 ? `${proRemaining}g remaining` : `${Math.abs(proRemaining)}g over`;
-    elements.proteinRemaining.className = `progress-remaining ${proRemaining < 0 ? 'over' : ''}`;
-
-    // Carbs
-    const carbPct = Math.min((totals.carbs / goals.carbs) * 100, 100);
-    const carbRemaining = goals.carbs - totals.carbs;
-    elements.carbsValue.textContent = `${totals.carbs}g / ${goals.carbs}g`;
-    elements.carbsBar.style.width = `${carbPct}%`;
-    elements.carbsRemaining.textContent = carbRemaining >= 0 ? `${carbRemaining}g remaining` : `${Math.abs(carbRemaining)}g over`;
-    elements.carbsRemaining.className = `progress-remaining ${carbRemaining < 0 ? 'over' : ''}`;
-
-    // Fat
-    const fatPct = Math.min((totals.fat / goals.fat) * 100, 100);
-    const fatRemaining = goals.fat - totals.fat;
-    elements.fatValue.textContent = `${totals.fat}g / ${goals.fat}g`;
-    elements.fatBar.style.width = `${fatPct}%`;
-    elements.fatRemaining.textContent = fatRemaining >= 0 ? `${fatRemaining}g remaining` : `${Math.abs(fatRemaining)}g over`;
-    elements.fatRemaining.className = `progress-remaining ${fatRemaining < 0 ? 'over' : ''}`;
+    // Skip the DOM writes when neither totals nor goals moved
+    const snapshot = [totals.calories, totals.protein, totals.carbs, totals.fat,
+        goals.calories, goals.protein, goals.carbs, goals.fat].join('|');
+    if (snapshot === renderCache.progress) return;
+    renderCache.progress = snapshot;
+
+    for (const { key, unit } of MACROS) {
+        const total = totals[key];
+        const goal = goals[key];
+        const pct = Math.min((total / goal) * 100, 100);
+        const remaining = goal - total;
+        elements[`${key}Value`].textContent = `${total}${unit} / ${goal}${unit}`;
+        elements[`${key}Bar`].style.width = `${pct}%`;
+        elements[`${key}Remaining`].textContent = remaining >= 0
+            ? `${remaining}${unit} remaining`
+            : `${Math.abs(remaining)}${unit} over`;
+        elements[`${key}Remaining`].className = `progress-remaining ${remaining < 0 ? 'over' : ''}`;
+    }
 }
 
 // Update meals list
 function updateMealsList() {
+    if (storeVersions.meals === renderCache.meals) return;
+    renderCache.meals = storeVersions.meals;
+
     if (state.meals.length === 0) {
         elements.mealsContainer.innerHTML = '<p class="empty-state">No meals logged yet. Add your first meal above!</p>';
         return;
@@ -440,7 +697,7 @@ function updateMealsList() {
                 <div class="meal-time">${meal.time}</div>
             </div>
             <div class="meal-actions">
-                <button onclick="removeMeal(${meal.id})" title="Remove">🗑️</button>
+                <button data-action="remove" data-id="${meal.id}" title="Remove">🗑️</button>
             </div>
         </div>
     `).join('');
@@ -448,6 +705,9 @@ function updateMealsList() {
 
 // Update favorites list
 function updateFavoritesList() {
+    if (storeVersions.favorites === renderCache.favorites) return;
+    renderCache.favorites = storeVersions.favorites;
+
     if (state.favorites.length === 0) {
         elements.favoritesContainer.innerHTML = '<p class="empty-state">No favorites yet. Add meals to your favorites for quick access!</p>';
         return;
@@ -460,8 +720,8 @@ function updateFavoritesList() {
                 <div class="meal-macros">${fav.calories} cal • ${fav.protein}g protein • ${fav.carbs}g carbs • ${fav.fat}g fat</div>
             </div>
             <div class="meal-actions">
-                <button onclick="addFavoriteToMeals(${fav.id})" title="Add to today">➕</button>
-                <button onclick="removeFavorite(${fav.id})" title="Remove">🗑️</button>
+                <button data-action="add" data-id="${fav.id}" title="Add to today">➕</button>
+                <button data-action="remove" data-id="${fav.id}" title="Remove">🗑️</button>
             </div>
         </div>
     `).join('');
@@ -469,6 +729,9 @@ function updateFavoritesList() {
 
 // Update history list
 function updateHistoryList() {
+    if (storeVersions.history === renderCache.history) return;
+    renderCache.history = storeVersions.history;
+
     if (state.history.length === 0) {
         elements.historyContainer.innerHTML = '<p class="empty-state">No history yet. Your daily totals will appear here.</p>';
         elements.clearHistoryBtn.classList.add('hidden');
@@ -476,12 +739,19 @@ function updateHistoryList() {
     }
 
     elements.clearHistoryBtn.classList.remove('hidden');
+
+    // Compute the Today/Yesterday boundaries once, not per row
+    const todayStr = getToday();
+    const yesterday = new Date();
+    yesterday.setDate(yesterday.getDate() - 1);
+    const yesterdayStr = yesterday.toISOString().split('T')[0];
+
     elements.historyContainer.innerHTML = state.history.map(day => {
         const calClass = day.calories <= day.goals.calories ? 'achieved' : 'over';
         const proClass = day.protein >= day.goals.protein ? 'achieved' : '';
         return `
             <div class="history-item">
-                <div class="history-date">${formatDate(day.date)}</div>
+                <div class="history-date">${formatDate(day.date, todayStr, yesterdayStr)}</div>
                 <div class="history-macros">
                     <span class="${calClass}">🔥 ${day.calories}/${day.goals.calories} cal</span>
                     <span class="${proClass}">🥩 ${day.protein}/${day.goals.protein}g protein</span>
@@ -493,23 +763,28 @@ function updateHistoryList() {
     }).join('');
 }
 
-// Format date
-function formatDate(dateStr) {
-    const date = new Date(dateStr + 'T00:00:00');
-    const today = new Date();
-    const yesterday = new Date(today);
-    yesterday.setDate(yesterday.getDate() - 1);
-
-    if (dateStr === getToday()) return 'Today';
-    if (dateStr === yesterday.toISOString().split('T')[0]) return 'Yesterday';
-    return date.toLocaleDateString('en-US', { weekday: 'short', month: 'short', day: 'numeric' });
+// Locale-formatted dates, cached per date string; toLocaleDateString is
+// by far the slowest part of building a history row
+const dateFormatCache = new Map();
+
+// Format date against precomputed Today/Yesterday strings
+function formatDate(dateStr, todayStr, yesterdayStr) {
+    if (dateStr === todayStr) return 'Today';
+    if (dateStr === yesterdayStr) return 'Yesterday';
+    let formatted = dateFormatCache.get(dateStr);
+    if (!formatted) {
+        const date = new Date(dateStr + 'T00:00:00');
+        formatted = date.toLocaleDateString('en-US', DATE_FORMAT);
+        dateFormatCache.set(dateStr, formatted);
+    }
+    return formatted;
 }
 
-// Escape HTML
+// Escape HTML (one shared scratch element instead of one per call)
+const escapeDiv = document.createElement('div');
 function escapeHtml(text) {
-    const div = document.createElement('div');
-    div.textContent = text;
-    return div.innerHTML;
+    escapeDiv.textContent = text;
+    return escapeDiv.innerHTML;
 }
 
 // Show toast notification